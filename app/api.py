@@ -1,5 +1,5 @@
 import os
-from fastapi import FastAPI, Response, Query
+from fastapi import FastAPI, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import psycopg2
@@ -10,8 +10,14 @@ import uvicorn
 import os
 import time
 import asyncio
+import gzip
+import struct
+from array import array
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from .config_watcher import ConfigWatcher
+from .feeds import normalize_building_feeds
+from .live_state import LIVE
 
 """FastAPI app providing crowd counts and history from PostgreSQL.
 
@@ -28,7 +34,7 @@ if getattr(sys, 'frozen', False):
 else:
     base_path = os.path.dirname(__file__)
 
-def _load_config(base_path: str) -> dict:
+def _load_config(base_path: str) -> tuple[str, dict]:
     candidates = [
         os.path.join(base_path, "config.json"),
         os.path.join(_project_root(base_path), "config", "config.json"),
@@ -38,13 +44,13 @@ def _load_config(base_path: str) -> dict:
         try:
             if os.path.exists(p):
                 with open(p, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                    return p, json.load(f)
         except Exception:
             pass
     raise FileNotFoundError("config.json not found in expected locations (app dir, ../config/, ../)")
 
 
-config = _load_config(base_path)
+config_path, config = _load_config(base_path)
 
 # --- DB credentials ---
 db_config = config.get("database", {})
@@ -58,18 +64,38 @@ DB_PASS = os.getenv("DB_PASS", db_config.get("password", "111@Postgres"))
 # --- Camera URLs & Thresholds ---
 camera_urls = {}
 thresholds = {}
-default_threshold = int(config.get("default_threshold", 50))
-for b_id, cams in config.get("buildings", {}).items():
-    if "entrance" in cams:
-        camera_urls[f"{b_id}_entrance"] = cams["entrance"]
-    if "exit" in cams:  # only add if it exists
-        camera_urls[f"{b_id}_exit"] = cams["exit"]
-    # collect per-building threshold if present
-    try:
-        thresholds[int(b_id)] = int(cams.get("threshold", default_threshold))
-    except Exception:
-        # ignore malformed ids/thresholds
-        pass
+default_threshold = 50
+
+def _apply_config(cfg: dict) -> None:
+    """(Re)build camera URLs and thresholds from a config dict.
+
+    New dicts are built first and then swapped in, so requests running
+    during a reload see either the old or the new set, never a partial one.
+    """
+    global camera_urls, thresholds, default_threshold
+    new_default = int(cfg.get("default_threshold", 50))
+    new_urls = {}
+    new_thresholds = {}
+    for b_id, cams in cfg.get("buildings", {}).items():
+        for feed in normalize_building_feeds(b_id, cams):
+            new_urls[f"{b_id}_{feed['id']}"] = feed["url"]
+        # collect per-building threshold if present
+        try:
+            new_thresholds[int(b_id)] = int(cams.get("threshold", new_default))
+        except Exception:
+            # ignore malformed ids/thresholds
+            pass
+    camera_urls = new_urls
+    thresholds = new_thresholds
+    default_threshold = new_default
+
+
+_apply_config(config)
+
+
+def _on_config_change(old_cfg: dict, new_cfg: dict) -> None:
+    _apply_config(new_cfg)
+    print("🔄 Config reloaded (API thresholds updated)")
 
 
 
@@ -101,9 +127,23 @@ async def lifespan(app: FastAPI):
             print(f"❌ API DB connect failed (attempt {retries}): {e}")
             await asyncio.sleep(5 * retries)
 
+    # Pick up threshold changes in config.json without restarting the API.
+    # Allow disabling in tests with DISABLE_CONFIG_WATCH=1
+    watcher = None
+    if os.getenv("DISABLE_CONFIG_WATCH") != "1":
+        watcher = ConfigWatcher(
+            config_path,
+            _on_config_change,
+            interval=config.get("config_reload_interval", 2),
+            initial=config,
+        )
+        watcher.start()
+
     try:
         yield
     finally:
+        if watcher:
+            watcher.stop()
         if cur:
             cur.close()
         if conn:
@@ -122,9 +162,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _db_timing(response: Response, started: float) -> None:
+    """Expose DB query time as a Server-Timing header (read by bench/load_test.py)."""
+    response.headers["Server-Timing"] = f"db;dur={(time.perf_counter() - started) * 1000:.2f}"
+
+
 # ---------------- API ENDPOINTS ----------------
 @app.get("/crowd")
-def get_crowd_counts():
+def get_crowd_counts(response: Response):
     """Returns latest crowd counts for all buildings."""
     if cur is None:
         return {"error": "Database not available"}
@@ -141,8 +186,10 @@ def get_crowd_counts():
             ) c ON true
             ORDER BY b.building_id;
         """
+        started = time.perf_counter()
         cur.execute(query)
         rows = cur.fetchall()
+        _db_timing(response, started)
     except Exception as e:
         return {"error": f"DB query failed: {e}"}
 
@@ -166,45 +213,239 @@ def list_routes():
 def root():
     return {"message": "API is running"}
 
+# ---------------- HISTORY ----------------
+# /crowd/history and /crowd/history/batch can answer in three formats, picked
+# with ?format= or the Accept header:
+#   json      [{"timestamp": ISO-8601, "count": n}, ...]  (default, unchanged)
+#   columnar  {"start": epoch_s, "end": epoch_s, "offsets": [s, ...], "counts": [n, ...]}
+#   binary    little-endian: b"CRH1", uint32 n_buildings, float64 start_epoch,
+#             then per building: int32 building_id, uint32 n, n*uint32 offsets, n*int32 counts
+# Offsets are whole seconds from `start` (the start of the requested range).
+# Bodies over 1 KB are gzip/brotli compressed when the client accepts it.
+COLUMNAR_MEDIA_TYPE = "application/vnd.crowd.columnar+json"
+BINARY_MEDIA_TYPE = "application/vnd.crowd.history"
+HISTORY_FORMAT_PATTERN = "^(json|columnar|binary)$"
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+def _history_range(minutes: int | None, start: str | None, end: str | None):
+    """Return (start_dt, end_dt) for a request, or None if start/end are not ISO-8601."""
+    if start and end:
+        try:
+            return datetime.fromisoformat(start), datetime.fromisoformat(end)
+        except Exception:
+            return None
+    end_dt = datetime.now()
+    lookback = minutes or 60
+    return end_dt - timedelta(minutes=int(lookback)), end_dt
+
+
+def _history_format(request: Request, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    accept = request.headers.get("accept", "")
+    if BINARY_MEDIA_TYPE in accept or "application/octet-stream" in accept:
+        return "binary"
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    return "json"
+
+
+def _epoch(ts) -> float:
+    # naive DB timestamps are local time, like the ISO strings the dashboard parses
+    return ts.timestamp()
+
+
+def _to_columns(rows, base: int):
+    offsets = [int(_epoch(row["timestamp"])) - base for row in rows]
+    counts = [row["current_count"] for row in rows]
+    return offsets, counts
+
+
+def _encode_binary(base: float, series: dict) -> bytes:
+    parts = [b"CRH1", struct.pack("<Id", len(series), base)]
+    for b_id, (offsets, counts) in series.items():
+        offsets_arr, counts_arr = array("I", offsets), array("i", counts)
+        if sys.byteorder == "big":
+            offsets_arr.byteswap()
+            counts_arr.byteswap()
+        parts.append(struct.pack("<iI", b_id, len(offsets)))
+        parts.append(offsets_arr.tobytes())
+        parts.append(counts_arr.tobytes())
+    return b"".join(parts)
+
+
+def _history_response(request: Request, body: bytes, media_type: str, db_ms: float) -> Response:
+    headers = {"Vary": "Accept, Accept-Encoding", "Server-Timing": f"db;dur={db_ms:.2f}"}
+    accepted = {e.split(";")[0].strip() for e in request.headers.get("accept-encoding", "").split(",")}
+    if len(body) >= 1024:
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _render_history(request: Request, fmt: str, start_dt: datetime, end_dt: datetime, series: dict, db_ms: float, single: bool):
+    """series: building_id -> rows (dicts with timestamp/current_count), ordered by time."""
+    base = int(_epoch(start_dt))
+    if fmt == "binary":
+        body = _encode_binary(base, {b_id: _to_columns(rows, base) for b_id, rows in series.items()})
+        return _history_response(request, body, BINARY_MEDIA_TYPE, db_ms)
+
+    if fmt == "columnar":
+        columns = {}
+        for b_id, rows in series.items():
+            offsets, counts = _to_columns(rows, base)
+            columns[b_id] = {"offsets": offsets, "counts": counts}
+        payload = {"start": base, "end": int(_epoch(end_dt))}
+        if single:
+            b_id, cols = next(iter(columns.items()))
+            payload.update({"buildingId": b_id, **cols})
+        else:
+            payload["buildings"] = columns
+        media_type = COLUMNAR_MEDIA_TYPE
+    else:
+        points = {
+            b_id: [
+                {
+                    "timestamp": (row["timestamp"].isoformat() if hasattr(row["timestamp"], "isoformat") else str(row["timestamp"])),
+                    "count": row["current_count"],
+                }
+                for row in rows
+            ]
+            for b_id, rows in series.items()
+        }
+        payload = next(iter(points.values())) if single else points
+        media_type = "application/json"
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return _history_response(request, body, media_type, db_ms)
+
+
 # Historical counts for a building
 @app.get("/crowd/history")
 def get_crowd_history(
+    request: Request,
     buildingId: int = Query(..., description="Building ID"),
     minutes: int | None = Query(60, ge=1, le=60*24*7, description="Lookback in minutes (ignored if start/end provided)"),
     start: str | None = Query(None, description="ISO datetime start, e.g., 2025-10-26T12:00:00"),
     end: str | None = Query(None, description="ISO datetime end, e.g., 2025-10-26T13:00:00"),
+    format: str | None = Query(None, pattern=HISTORY_FORMAT_PATTERN, description="json (default), columnar or binary; overrides Accept"),
 ):
     if cur is None:
         return {"error": "Database not available"}
+    time_range = _history_range(minutes, start, end)
+    if time_range is None:
+        return {"error": "Invalid start/end format. Use ISO-8601, e.g., 2025-10-26T12:00:00"}
+    start_dt, end_dt = time_range
     try:
-        if start and end:
-            try:
-                start_dt = datetime.fromisoformat(start)
-                end_dt = datetime.fromisoformat(end)
-            except Exception:
-                return {"error": "Invalid start/end format. Use ISO-8601, e.g., 2025-10-26T12:00:00"}
-        else:
-            end_dt = datetime.now()
-            lookback = minutes or 60
-            start_dt = end_dt - timedelta(minutes=int(lookback))
-
         query = (
             "SELECT timestamp, current_count FROM crowd_counts "
             "WHERE building_id = %s AND timestamp BETWEEN %s AND %s "
             "ORDER BY timestamp ASC"
         )
+        started = time.perf_counter()
         cur.execute(query, (buildingId, start_dt, end_dt))
         rows = cur.fetchall()
-        return [
-            {
-                "timestamp": (row["timestamp"].isoformat() if hasattr(row["timestamp"], "isoformat") else str(row["timestamp"])),
-                "count": row["current_count"],
-            }
-            for row in rows
-        ]
+        db_ms = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return {"error": f"DB query failed: {e}"}
+    return _render_history(request, _history_format(request, format), start_dt, end_dt, {buildingId: rows}, db_ms, single=True)
+
+
+# Historical counts for many buildings in one request
+@app.get("/crowd/history/batch")
+def get_crowd_history_batch(
+    request: Request,
+    buildingIds: str | None = Query(None, description="Comma-separated building IDs, e.g. 1,3 (default: all)"),
+    minutes: int | None = Query(60, ge=1, le=60*24*7, description="Lookback in minutes (ignored if start/end provided)"),
+    start: str | None = Query(None, description="ISO datetime start, e.g., 2025-10-26T12:00:00"),
+    end: str | None = Query(None, description="ISO datetime end, e.g., 2025-10-26T13:00:00"),
+    format: str | None = Query(None, pattern=HISTORY_FORMAT_PATTERN, description="json (default), columnar or binary; overrides Accept"),
+):
+    if cur is None:
+        return {"error": "Database not available"}
+    ids = None
+    if buildingIds:
+        try:
+            ids = [int(x) for x in buildingIds.split(",") if x.strip()]
+        except ValueError:
+            return {"error": "Invalid buildingIds. Use comma-separated integers, e.g., 1,3"}
+    time_range = _history_range(minutes, start, end)
+    if time_range is None:
+        return {"error": "Invalid start/end format. Use ISO-8601, e.g., 2025-10-26T12:00:00"}
+    start_dt, end_dt = time_range
+    try:
+        query = (
+            "SELECT building_id, timestamp, current_count FROM crowd_counts "
+            "WHERE timestamp BETWEEN %s AND %s "
+            + ("AND building_id = ANY(%s) " if ids is not None else "")
+            + "ORDER BY building_id, timestamp ASC"
+        )
+        params = (start_dt, end_dt) + ((ids,) if ids is not None else ())
+        started = time.perf_counter()
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        db_ms = (time.perf_counter() - started) * 1000
     except Exception as e:
         return {"error": f"DB query failed: {e}"}
 
+    series = {b_id: [] for b_id in (ids or [])}
+    for row in rows:
+        series.setdefault(row["building_id"], []).append(row)
+    return _render_history(request, _history_format(request, format), start_dt, end_dt, series, db_ms, single=False)
+
+# ---------------- LIVE ----------------
+# Latest detections/tracks per feed from the pipeline's in-memory state.
+# Only populated when the API runs inside main.py ("live_api" in config.json).
+@app.get("/live")
+def get_live_feeds():
+    """Lists feeds with a published frame, newest state only (no images)."""
+    return LIVE.feeds()
+
+@app.get("/live/pipeline")
+def get_live_pipeline():
+    """Per-stage queue occupancy/latency of the running pipeline."""
+    stats = LIVE.stats()
+    if stats is None:
+        return {"error": "Pipeline not running in this process"}
+    return stats
+
+@app.get("/live/{buildingId}/{feedId}")
+def get_live_feed(buildingId: int, feedId: str):
+    """Returns the latest detections and confirmed tracks of one feed."""
+    data = LIVE.detections(buildingId, feedId)
+    if data is None:
+        return {"error": f"No live data for feed {buildingId}:{feedId}"}
+    return data
+
+@app.get("/live/{buildingId}/{feedId}/snapshot.jpg")
+def get_live_snapshot(
+    request: Request,
+    buildingId: int,
+    feedId: str,
+    quality: int = Query(80, ge=10, le=95, description="JPEG quality"),
+):
+    """Returns the latest frame as JPEG; encoded once per frame and reused by all viewers."""
+    def etag(frame_id):
+        return f'"{buildingId}:{feedId}:{frame_id}:{quality}"'
+
+    # check the client's copy before encoding anything
+    frame_id = LIVE.frame_id(buildingId, feedId)
+    if frame_id is not None and request.headers.get("if-none-match") == etag(frame_id):
+        return Response(status_code=304, headers={"ETag": etag(frame_id), "Cache-Control": "no-cache"})
+    data, frame_id = LIVE.jpeg(buildingId, feedId, quality)
+    if data is None:
+        return Response(status_code=404)
+    headers = {"ETag": etag(frame_id), "Cache-Control": "no-cache"}
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
 # Serve React build if present, otherwise fall back to current directory
 # Allow disabling in tests with DISABLE_STATIC=1 to avoid any route shadowing
 if os.getenv("DISABLE_STATIC") != "1":
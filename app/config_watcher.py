@@ -0,0 +1,112 @@
+# config_watcher.py
+import json
+import logging
+import os
+import threading
+
+from .feeds import normalize_building_feeds
+
+
+def load_config_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def diff_buildings(old, new):
+    """Compare two `buildings` config sections.
+
+    Returns a dict of building id lists:
+      - added:     present only in `new`
+      - removed:   present only in `old`
+      - restarted: feeds added/removed or urls changed, streams must be reopened
+      - updated:   only lines/threshold/grouping changed, can be applied in place
+    """
+    old = old or {}
+    new = new or {}
+    result = {"added": [], "removed": [], "restarted": [], "updated": []}
+
+    for b_id in new:
+        if b_id not in old:
+            result["added"].append(b_id)
+    for b_id in old:
+        if b_id not in new:
+            result["removed"].append(b_id)
+
+    for b_id in new:
+        if b_id not in old or old[b_id] == new[b_id]:
+            continue
+        if _feed_urls(b_id, old[b_id]) != _feed_urls(b_id, new[b_id]):
+            result["restarted"].append(b_id)
+        else:
+            result["updated"].append(b_id)
+    return result
+
+
+def _feed_urls(building_id, building_cfg):
+    return {f["id"]: f["url"] for f in normalize_building_feeds(building_id, building_cfg)}
+
+
+class ConfigWatcher:
+    """Polls a config file and calls `on_change(old, new)` when it changes.
+
+    Polling on mtime/size keeps this dependency-free and works the same on
+    Windows and Linux. A file that fails to parse (e.g. saved half-way) is
+    ignored and the running config is kept.
+    """
+
+    def __init__(self, path, on_change, interval=2.0, initial=None):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.config = initial if initial is not None else load_config_file(path)
+        self._stamp = self._file_stamp()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def poll(self):
+        """Check the file once. Returns True if a new config was applied."""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            new_config = load_config_file(self.path)
+        except Exception as e:
+            logging.error(f"❌ Config reload failed, keeping current config: {e}")
+            return False
+        if new_config == self.config:
+            return False
+
+        try:
+            self.on_change(self.config, new_config)
+        except Exception as e:
+            # keep diffing against the last applied config and retry next poll;
+            # on_change handlers are idempotent, so a partial apply is redone
+            logging.error(f"❌ Applying reloaded config failed, will retry: {e}")
+            self._stamp = None
+            return False
+        self.config = new_config
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logging.info(f"👀 Watching config for changes: {self.path}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -52,6 +52,18 @@ class CrowdDatabase:
             logging.warning("⚠️ Lost DB connection. Reconnecting...")
             self.connect()
 
+    def refresh_building_ids(self):
+        """Re-read building IDs, e.g. after buildings were added to the config."""
+        try:
+            self.reconnect_if_needed()
+            if self.conn is None:
+                return
+            self.cur.execute("SELECT building_id FROM buildings")
+            self.building_ids = [row[0] for row in self.cur.fetchall()]
+        except Exception as e:
+            logging.error(f"❌ Failed to refresh building IDs: {e}")
+            self.connect()
+
     def insert_count(self, building_id, current_count):
         try:
             self.reconnect_if_needed()
@@ -0,0 +1,108 @@
+# feeds.py
+"""Feed config normalization and line-crossing geometry.
+
+Kept free of OpenCV/YOLO imports so the API and config watcher can use it.
+"""
+import logging
+
+
+def normalize_feed_entry(entry):
+    """Normalize one feed entry (string url or dict) to {"url", "lines", "group"}."""
+    if isinstance(entry, str):
+        return {"url": entry, "lines": [], "group": None}
+    if isinstance(entry, dict):
+        url = entry.get("url") or entry.get("rtsp") or entry.get("feed")
+        lines = entry.get("lines")
+        if lines is None:
+            lines = [entry["line"]] if entry.get("line") else []
+        return {
+            "url": url,
+            "lines": list(lines),  # full line objects
+            "group": entry.get("overlap_group"),
+        }
+    return {"url": None, "lines": [], "group": None}
+
+
+def normalize_building_feeds(building_id, building_cfg):
+    """Return the feeds of one building as a list of normalized dicts.
+
+    Supports the legacy `entrance`/`exit` keys as well as a `feeds` list:
+
+        "feeds": [
+          {"id": "north", "url": "...", "lines": [{...}, {...}], "overlap_group": "lobby"},
+          {"id": "south", "url": "...", "line": {...}}
+        ]
+
+    Each feed gets a stable `key` ("<building>:<feed id>") used by the
+    pipeline and the config reloader. Feeds without an id use their list
+    index; a repeated id (e.g. a feed named "entrance" next to the legacy
+    `entrance` key) is logged and only its first occurrence is kept.
+    """
+    entries = []
+    for entry in building_cfg.get("feeds", []):
+        feed_id = entry.get("id") if isinstance(entry, dict) else None
+        entries.append((str(feed_id) if feed_id is not None else None, entry))
+    for role in ("entrance", "exit"):
+        if role in building_cfg:
+            entries.append((role, building_cfg[role]))
+
+    # unnamed feeds get their list index as id, skipping ids used explicitly
+    explicit = {feed_id for feed_id, _ in entries if feed_id is not None}
+    feeds = []
+    seen = set()
+    for i, (feed_id, entry) in enumerate(entries):
+        if feed_id is None:
+            feed_id = str(i)
+            while feed_id in explicit or feed_id in seen:
+                feed_id = f"{feed_id}_"
+        if feed_id in seen:
+            logging.warning(f"Building {building_id}: duplicate feed id '{feed_id}' ignored")
+            continue
+        seen.add(feed_id)
+        feed = normalize_feed_entry(entry)
+        if not feed["url"]:
+            continue
+        feed.update({"key": f"{building_id}:{feed_id}", "building_id": building_id, "id": feed_id})
+        feeds.append(feed)
+    return feeds
+
+
+def line_position(line_cfg):
+    """Return (hline, vline, enter_direction) for a line config; unused axis is None."""
+    hline, vline = None, None
+    if not line_cfg:
+        return hline, vline, None
+    if line_cfg["type"] == "horizontal":
+        hline = line_cfg["coords"][1]
+    elif line_cfg["type"] == "vertical":
+        vline = line_cfg["coords"][0]
+    # 'down'|'up' for horizontal, 'right'|'left' for vertical
+    return hline, vline, line_cfg.get("enter_direction")
+
+
+def crossing_direction(line_cfg, prev, cur):
+    """Return "in", "out" or None for a centre moving from prev (cx, cy) to cur."""
+    hline, vline, enter_dir = line_position(line_cfg)
+    prev_cx, prev_cy = prev
+    cx, cy = cur
+
+    # Horizontal line logic
+    if hline is not None:
+        crossed_down = prev_cy < hline <= cy   # top -> bottom
+        crossed_up   = prev_cy > hline >= cy   # bottom -> top
+        if crossed_down or crossed_up:
+            desired = enter_dir or "down"  # default old behavior
+            if (crossed_down and desired == "down") or (crossed_up and desired == "up"):
+                return "in"
+            return "out"
+
+    # Vertical line logic
+    if vline is not None:
+        crossed_right = prev_cx < vline <= cx  # left -> right
+        crossed_left  = prev_cx > vline >= cx  # right -> left
+        if crossed_right or crossed_left:
+            desired = enter_dir or "right"
+            if (crossed_right and desired == "right") or (crossed_left and desired == "left"):
+                return "in"
+            return "out"
+    return None
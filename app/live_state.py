@@ -0,0 +1,157 @@
+# live_state.py
+"""Latest detections/tracks per feed, published by the pipeline's sink stage.
+
+Publishing only swaps a reference to data the pipeline already produced, so
+the hot loop does no extra inference, copying or encoding. JPEG snapshots are
+encoded on request and cached per frame, so any number of viewers of the same
+frame cost one encode.
+
+The state lives in memory, so the API only sees it when it runs inside the
+pipeline process (`"live_api": {"enabled": true}` in config.json).
+"""
+import threading
+import time
+
+
+def draw_overlay(frame, tracks, lines, inside):
+    """Draw track boxes, counting lines and the building count onto `frame` in place."""
+    import cv2
+    from .feeds import line_position
+
+    h, w = frame.shape[:2]
+    for tid, x1, y1, x2, y2 in tracks:
+        # draw bbox + id
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, f"ID {tid}", (x1, y1-5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+    # draw lines if present
+    for line_cfg in lines:
+        hline, vline, _ = line_position(line_cfg)
+        if hline is not None:
+            cv2.line(frame, (0, hline), (w, hline), (255,0,0), 2)
+            cv2.putText(frame, f"H: {hline}", (10, max(20, hline-10)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
+        if vline is not None:
+            cv2.line(frame, (vline, 0), (vline, h), (255,0,0), 2)
+            cv2.putText(frame, f"V: {vline}", (min(w-80, vline+5), 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
+    # draw building occupancy
+    cv2.putText(frame, f"Inside: {inside}", (20,40),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
+
+
+class _Snapshot:
+    """One published frame of a feed. Never mutated after publish except its JPEG cache."""
+
+    def __init__(self, owner, fields):
+        self.owner = owner
+        self.fields = fields
+        self.jpegs = {}  # quality -> bytes
+        self.lock = threading.Lock()
+
+
+class LiveState:
+    def __init__(self):
+        self._feeds = {}  # feed key -> _Snapshot
+        self._lock = threading.Lock()
+        self.stats_provider = None  # e.g. Pipeline.stats, set by main.py
+
+    def publish(self, key, owner, **fields):
+        """Store the latest frame of a feed.
+
+        `owner` identifies the publisher (the pipeline's FeedState), so a
+        retired feed can't remove the snapshot of its replacement.
+        Expected fields: building_id, feed_id, frame_id, timestamp, frame,
+        detections, tracks, lines, inside, annotated (overlay already drawn).
+        """
+        snapshot = _Snapshot(owner, fields)
+        with self._lock:
+            self._feeds[key] = snapshot
+
+    def remove(self, key, owner):
+        """Drop a feed's snapshot if it was published by `owner`."""
+        with self._lock:
+            snapshot = self._feeds.get(key)
+            if snapshot is not None and snapshot.owner is owner:
+                del self._feeds[key]
+
+    def _get(self, building_id, feed_id):
+        with self._lock:
+            return self._feeds.get(f"{building_id}:{feed_id}")
+
+    def feeds(self):
+        """Summary of every live feed, without frames."""
+        with self._lock:
+            snapshots = list(self._feeds.items())
+        now = time.time()
+        return [
+            {
+                "key": key,
+                "buildingId": s.fields["building_id"],
+                "feedId": s.fields["feed_id"],
+                "frameId": s.fields["frame_id"],
+                "timestamp": s.fields["timestamp"],
+                "ageSeconds": round(now - s.fields["timestamp"], 2),
+                "tracks": len(s.fields["tracks"]),
+                "inside": s.fields["inside"],
+            }
+            for key, s in sorted(snapshots)
+        ]
+
+    def detections(self, building_id, feed_id):
+        """Latest detections/tracks of one feed, or None if it is not live."""
+        s = self._get(building_id, feed_id)
+        if s is None:
+            return None
+        f = s.fields
+        return {
+            "buildingId": f["building_id"],
+            "feedId": f["feed_id"],
+            "frameId": f["frame_id"],
+            "timestamp": f["timestamp"],
+            "ageSeconds": round(time.time() - f["timestamp"], 2),
+            "inside": f["inside"],
+            "lines": f["lines"],
+            # DeepSort input format: [left, top, width, height], confidence, class id
+            "detections": [
+                {"bbox": list(bbox), "confidence": round(conf, 3), "classId": cls}
+                for bbox, conf, cls in f["detections"]
+            ],
+            "tracks": [
+                {"id": tid, "bbox": [x1, y1, x2, y2]}
+                for tid, x1, y1, x2, y2 in f["tracks"]
+            ],
+        }
+
+    def frame_id(self, building_id, feed_id):
+        """Frame id of a feed's latest snapshot, or None if it is not live."""
+        s = self._get(building_id, feed_id)
+        return None if s is None else s.fields["frame_id"]
+
+    def jpeg(self, building_id, feed_id, quality=80):
+        """Return (jpeg_bytes, frame_id) for the latest frame, encoding at most once per frame."""
+        s = self._get(building_id, feed_id)
+        if s is None:
+            return None, None
+        with s.lock:
+            data = s.jpegs.get(quality)
+            if data is None:
+                import cv2
+
+                f = s.fields
+                frame = f["frame"]
+                if not f["annotated"]:
+                    # display is off, so nothing drew on the frame: draw on a copy
+                    frame = frame.copy()
+                    draw_overlay(frame, f["tracks"], f["lines"], f["inside"])
+                ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                if not ok:
+                    return None, None
+                data = s.jpegs[quality] = buf.tobytes()
+        return data, s.fields["frame_id"]
+
+    def stats(self):
+        return self.stats_provider() if self.stats_provider else None
+
+
+LIVE = LiveState()
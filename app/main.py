@@ -3,6 +3,11 @@ from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 import cv2
 from .db_handler import CrowdDatabase
+from .config_watcher import ConfigWatcher, diff_buildings
+from .feeds import normalize_building_feeds, crossing_direction
+from .occupancy import OccupancyAggregator
+from .pipeline import Stage, Pipeline
+from .live_state import LIVE, draw_overlay
 import threading
 import time
 import json
@@ -68,11 +73,28 @@ def _resolve_model_path(path: str) -> str:
             return p
     return path
 
-model = YOLO(_resolve_model_path(model_path))
-if device == "cuda":
-    model.to("cuda")
-else:
-    model.to("cpu")
+def load_model():
+    m = YOLO(_resolve_model_path(model_path))
+    if device == "cuda":
+        m.to("cuda")
+    else:
+        m.to("cpu")
+    return m
+
+model = load_model()
+
+# Each detect worker needs its own YOLO instance; the first one reuses `model`.
+_spare_models = [model]
+_models_lock = threading.Lock()
+_thread_models = threading.local()
+
+def _worker_model():
+    m = getattr(_thread_models, "model", None)
+    if m is None:
+        with _models_lock:
+            m = _spare_models.pop() if _spare_models else load_model()
+        _thread_models.model = m
+    return m
 
 # -------------------- DATABASE --------------------
 db_cfg = config.get("database", {})
@@ -89,392 +111,407 @@ db = CrowdDatabase(
     password=db_pass,
     update_interval=config.get("update_interval", 10),
 )
+db_lock = threading.Lock() # to protect db cursor access (updater + config watcher)
 
-# Counting line positions
-# line_y_in = 240
-# line_y_out = 240
-
-# -------------------- BUILDING THREAD FUNCTION --------------------
-def process_building(building_id, feeds, shared_counters, lock):
-    tracker_in = DeepSort(max_age=30)
-    tracker_out = DeepSort(max_age=30)
-
-    # Normalize feed entries (support string or dict in config)
-    def normalize_feed_entry(entry):
-        if isinstance(entry, str):
-            return {"url": entry, "line": None}
-        if isinstance(entry, dict):
-            url = entry.get("url") or entry.get("rtsp") or entry.get("feed")
-            return {
-                "url": url,
-                "line": entry.get("line")  # full line object
-            }
-        return {"url": None, "line": None}
-
-
-    entrance_cfg = normalize_feed_entry(feeds.get("entrance"))
-    exit_cfg = normalize_feed_entry(feeds.get("exit"))
-
-    def _resolve_media_url(url: str | None) -> str | None:
-        if not url:
-            return url
-        # network streams
-        if "://" in url:
-            return url
-        if os.path.isabs(url) and os.path.exists(url):
-            return url
-        # try common locations
-        candidates = [
-            os.path.join(base_dir, url),
-            os.path.join(_project_root(base_dir), url),
-            os.path.join(_project_root(base_dir), "media", url),
-            os.path.join(_project_root(base_dir), "assets", "media", url),
-        ]
-        for p in candidates:
-            if os.path.exists(p):
-                return p
+def _resolve_media_url(url: str | None) -> str | None:
+    if not url:
         return url
-
-    entrance_url = _resolve_media_url(entrance_cfg["url"])  # type: ignore[index]
-    exit_url = _resolve_media_url(exit_cfg["url"])  # type: ignore[index]
-
-    counters = {
-        "entrance_count": 0,
-        "exit_count": 0,
-        # memory maps tid -> {"cx": int, "cy": int}
-        "memory_in": {},
-        "memory_out": {},
+    # network streams
+    if "://" in url:
+        return url
+    if os.path.isabs(url) and os.path.exists(url):
+        return url
+    # try common locations
+    candidates = [
+        os.path.join(base_dir, url),
+        os.path.join(_project_root(base_dir), url),
+        os.path.join(_project_root(base_dir), "media", url),
+        os.path.join(_project_root(base_dir), "assets", "media", url),
+    ]
+    for p in candidates:
+        if os.path.exists(p):
+            return p
+    return url
+
+
+# -------------------- FEED STATE --------------------
+# Upper bound for FFmpeg to open/read a stream, so an unreachable camera can't
+# hold a thread for the backend's default (which can be 30 s or more)
+stream_timeout_ms = int(config.get("stream_timeout_ms", 10000))
+
+class FeedState:
+    """Per-feed state shared by the pipeline stages.
+
+    `feed` is a normalized feed dict (see feeds.normalize_building_feeds);
+    the config reloader replaces its "lines"/"group" in place and the next
+    counted frame picks them up. Setting `closed` retires the feed: the
+    capture stage releases the stream and stops scheduling it.
+    """
+
+    def __init__(self, feed, aggregator):
+        self.feed = feed
+        self.aggregator = aggregator
+        self.key = feed["key"]
+        self.label = f"[Building {feed['building_id']}:{feed['id']}]"
+        self.window = f"Building {feed['building_id']} {feed['id']}"
+        self.url = _resolve_media_url(feed["url"])
+        self.closed = False
+        # capture
+        self.cap = None
+        self.cap_lock = threading.Lock()  # opener thread vs capture worker
+        self.opening = False
+        self.next_open = 0.0
+        self.open_failures = 0
+        self.frame_id = 0  # Keeps track of the frame number for this camera.
+        # track / count
+        self.tracker = DeepSort(max_age=30)
+        self.last_tracked = 0  # frame id of the last frame given to the tracker
+        # memory maps tid -> (cx, cy)
+        self.memory = {}
         # store frame id when we last counted that tid to avoid duplicate counts
-        "last_count_frame_in": {},
-        "last_count_frame_out": {},
-    }
-    frame_id = {"entrance": 0, "exit": 0} #Keeps track of the frame number for both cameras.
-
-    # helper: open VideoCapture with retries
-    def open_capture(url):
-        cap = cv2.VideoCapture(url) #Tries to open the camera stream or video file at the given UR
-        retry = 0
-        while not cap.isOpened():
-            print(f"[Building {building_id}] Failed to open {url}. Retrying in 5 seconds...")
-            time.sleep(5)
-            cap = cv2.VideoCapture(url)
-            retry += 1
-            if retry > 12:
-                print(f"[Building {building_id}] Could not open {url} after multiple attempts.")
-                return None
-        return cap
-
-    cap_in = open_capture(entrance_url) #Tries to open the entrance camera stream or video file.
-    cap_out = None
-    # Only open exit capture if exit feed is provided
-    if "exit" in feeds:
-        cap_out = open_capture(exit_cfg["url"])
-
-    # If both streams failed to open, exit thread
-    if cap_in is None and cap_out is None:
-        print(f"[Building {building_id}] Streams not available. Exiting thread.")
-        return
-
-    # helper: convert normalized or pixel spec -> pixel coordinate for this frame size
-    def spec_to_pixel(spec, length):
-        if spec is None:
-            return None
-        # Tries to convert spec into a floating-point number.
+        self.last_count_frame = {}
+
+    # Opening a stream can block for the whole FFmpeg timeout, so it happens
+    # on a short-lived thread; the capture workers keep serving other feeds
+    # and skip this one until it is open. Failed opens are retried every 5 s.
+    def ensure_open(self):
+        cap = self.cap
+        if cap is not None and cap.isOpened():
+            return True
+        if cap is not None:
+            self.release()
+        if not self.opening and time.time() >= self.next_open:
+            self.opening = True
+            threading.Thread(target=self._open, name=f"open-{self.key}", daemon=True).start()
+        return False
+
+    def _open(self):
         try:
-            v = float(spec) 
-        except Exception: 
+            cap = cv2.VideoCapture(self.url, cv2.CAP_ANY, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, stream_timeout_ms,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, stream_timeout_ms,
+            ])
+            if cap.isOpened():
+                self.open_failures = 0
+                with self.cap_lock:
+                    if self.closed:
+                        cap.release()  # retired while we were connecting
+                    else:
+                        self.cap = cap
+                return
+            cap.release()
+            self.open_failures += 1
+            print(f"{self.label} Failed to open {self.url}. Retrying in 5 seconds...")
+            if self.open_failures == 12:
+                print(f"{self.label} Could not open {self.url} after multiple attempts.")
+            self.next_open = time.time() + 5
+        finally:
+            self.opening = False
+
+    def release(self):
+        with self.cap_lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
+
+# -------------------- DISPLAY --------------------
+# OpenCV windows must only be touched from one thread: the sink hands the
+# latest frame per window to the main thread, which shows them.
+display_frames = {}  # window name -> (FeedState, latest frame)
+display_lock = threading.Lock()
+shown_windows = {}  # window name -> FeedState (main thread only)
+
+def show_frame(state, frame):
+    with display_lock:
+        display_frames[state.window] = (state, frame)
+
+def update_display():
+    with display_lock:
+        frames = dict(display_frames)
+        display_frames.clear()
+    for window, (state, frame) in frames.items():
+        if not state.closed:
+            cv2.imshow(window, frame)
+            shown_windows[window] = state
+    # close the windows of retired feeds
+    for window, state in list(shown_windows.items()):
+        if state.closed:
+            del shown_windows[window]
+            try:
+                cv2.destroyWindow(window)
+            except cv2.error:
+                pass  # window was never shown
+    return cv2.waitKey(30) & 0xFF
+
+
+# -------------------- PIPELINE STAGES --------------------
+# capture -> preprocess -> detect -> track -> count -> sink
+# Items are dicts: {"state", "frame_id", "timestamp", "frame", "detections", "tracks"}.
+pipeline_cfg = config.get("pipeline", {})
+display = bool(pipeline_cfg.get("display", True))
+shutdown = threading.Event()
+
+def capture(state):
+    """Read the next frame of one feed. The feed is re-queued for its next turn.
+
+    Only every 3rd frame is decoded; the others are just grabbed.
+    """
+    if state.closed:
+        state.release()  # retired by the config reloader
+        return None
+    try:
+        if not state.ensure_open():
             return None
-        if 0.0 <= v <= 1.0: #If the given value is between 0 and 1, it’s treated as a normalized ratio.
-            return int(v * length)
-        return int(v) #Otherwise, treat it as a raw pixel value.
-
-    while True:
-        # --- Entrance ---
-        if not cap_in.isOpened():
-            print(f"[Building {building_id}] Entrance stream lost. Reconnecting...")
-            cap_in.release() #Releases the current VideoCapture object.
-            cap_in = open_capture(entrance_url)
-            if cap_in is None:
-                time.sleep(5)
-                continue
-
-        ret_in, frame_in = cap_in.read() #Reads one frame from the entrance video feed.
+        state.frame_id += 1
+        if state.frame_id % 3 != 0:
+            ok, frame = state.cap.grab(), None
+        else:
+            ok, frame = state.cap.read()
         # If reading fails, try to reconnect.
-        if not ret_in:
-            print(f"[Building {building_id}] Entrance read failed. Reconnecting...")
-            cap_in.release()
-            cap_in = open_capture(entrance_url)
-            continue
-        
-
-        frame_id["entrance"] += 1 #
-        if frame_id["entrance"] % 3 == 0:
-            frame_in = cv2.resize(frame_in, (640, 480))
-            h_in, w_in = frame_in.shape[:2] 
-
-            # compute pixel line positions for this resolution
-            line_cfg = entrance_cfg.get("line") #Gets the line configuration for the entrance camera.
-            hline_in, vline_in = None, None #Initializes horizontal and vertical line positions to None.
-            enter_dir_in = None
-            if line_cfg:
-                enter_dir_in = line_cfg.get("enter_direction")  # 'down'|'up' for horizontal, 'right'|'left' for vertical
-                if line_cfg["type"] == "horizontal":
-                    hline_in = line_cfg["coords"][1]
-                elif line_cfg["type"] == "vertical":
-                    vline_in = line_cfg["coords"][0]
-
-            
-            results_in = model(frame_in, conf=0.4, verbose=False)
-            # extract person detections
-            detections_in = [
-                ([int(r.xyxy[0][0]), int(r.xyxy[0][1]),
-                  int(r.xyxy[0][2] - r.xyxy[0][0]),
-                  int(r.xyxy[0][3] - r.xyxy[0][1])],
-                 float(r.conf[0]), int(r.cls[0]))
-                for r in results_in[0].boxes if model.names[int(r.cls[0])] == "person"
-            ]
-
-            # deep sort tracking
-            tracks_in = tracker_in.update_tracks(detections_in, frame=frame_in) 
-            #Updates the tracker with the new detections for the current frame.
-            for track in tracks_in:
-                if not track.is_confirmed():
-                    continue
-                tid = track.track_id #Gets the unique track ID for the current tracked object.
-                x1, y1, x2, y2 = map(int, track.to_ltrb()) #Gets the bounding box coordinates for the tracked object.
-                cx, cy = (x1 + x2)//2, (y1 + y2)//2 #Calculates the center coordinates of the bounding box.
-
-                # only for one direction
-                # prev = counters["memory_in"].get(tid)
-                # counted = False
-                # # simple debounce: ignore if we counted this tid in last 5 frames
-                # last_frame = counters["last_count_frame_in"].get(tid, -9999)
-                # if prev is not None and (frame_id["entrance"] - last_frame) > 5:
-                #     prev_cx, prev_cy = prev["cx"], prev["cy"]
-                #     # horizontal crossing (downwards)
-                #     if hline_in is not None and prev_cy < hline_in <= cy:
-                #         counters["entrance_count"] += 1
-                #         counted = True
-                #     # vertical crossing (rightwards) - only count if not already counted this update
-                #     if (not counted) and vline_in is not None and prev_cx < vline_in <= cx:
-                #         counters["entrance_count"] += 1
-                #         counted = True
-                #     if counted:
-                #         counters["last_count_frame_in"][tid] = frame_id["entrance"]
-                
-                prev = counters["memory_in"].get(tid) #Retrieves the previous position of the tracked object from memory.
-                last_frame = counters["last_count_frame_in"].get(tid, -9999) #Gets the last frame number when this object was counted.
-                # simple debounce: ignore if we counted this tid in last 5 frames
-                if prev is not None and (frame_id["entrance"] - last_frame) > 5:
-                    prev_cx, prev_cy = prev["cx"], prev["cy"] #Gets the previous center coordinates of the tracked object.
-
-                    # Horizontal line logic
-                    if hline_in is not None:
-                        crossed_down = prev_cy < hline_in <= cy   # top -> bottom
-                        crossed_up   = prev_cy > hline_in >= cy   # bottom -> top
-                        if crossed_down or crossed_up:
-                            # determine which direction counts as entrance
-                            desired = enter_dir_in or "down"  # default old behavior
-                            if (crossed_down and desired == "down") or (crossed_up and desired == "up"):
-                                counters["entrance_count"] += 1
-                            else:
-                                counters["exit_count"] += 1
-                            counters["last_count_frame_in"][tid] = frame_id["entrance"]
-
-                    # Vertical line logic
-                    if vline_in is not None:
-                        crossed_right = prev_cx < vline_in <= cx  # left -> right
-                        crossed_left  = prev_cx > vline_in >= cx  # right -> left
-                        if crossed_right or crossed_left:
-                            desired = enter_dir_in or "right"
-                            if (crossed_right and desired == "right") or (crossed_left and desired == "left"):
-                                counters["entrance_count"] += 1
-                            else:
-                                counters["exit_count"] += 1
-                            counters["last_count_frame_in"][tid] = frame_id["entrance"]
-
-
-                # update memory
-                counters["memory_in"][tid] = {"cx": cx, "cy": cy} #Updates the memory with the current position of the tracked object.
-
-                # draw bbox + id
-                cv2.rectangle(frame_in, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame_in, f"IN ID {tid}", (x1, y1-5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
-
-            # draw lines if present
-            if hline_in is not None:
-                cv2.line(frame_in, (0, hline_in), (w_in, hline_in), (255,0,0), 2)
-                cv2.putText(frame_in, f"H: {hline_in}", (10, max(20, hline_in-10)),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
-            if vline_in is not None:
-                cv2.line(frame_in, (vline_in, 0), (vline_in, h_in), (255,0,0), 2)
-                cv2.putText(frame_in, f"V: {vline_in}", (min(w_in-80, vline_in+5), 20),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
-            # draw counts
-            cv2.putText(frame_in, f"Entrance: {counters['entrance_count']}", (20,40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
-            cv2.imshow(f"Building {building_id} Entrance", frame_in)
-
-        # --- Exit ---
-        if cap_out is not None:
-            ret_out, frame_out = cap_out.read()
-            if ret_out:
-        # your exit-processing code here
-                if not cap_out.isOpened():
-                    print(f"[Building {building_id}] Exit stream lost. Reconnecting...")
-                    cap_out.release()
-                    cap_out = open_capture(exit_url)
-                    if cap_out is None:
-                        time.sleep(5)
-                        continue
-
-                ret_out, frame_out = cap_out.read()
-                if not ret_out:
-                    print(f"[Building {building_id}] Exit read failed. Reconnecting...")
-                    cap_out.release()
-                    cap_out = open_capture(exit_url)
-                    continue
-
-                frame_id["exit"] += 1
-                if frame_id["exit"] % 3 == 0:
-                    frame_out = cv2.resize(frame_out, (640, 480))
-                    h_out, w_out = frame_out.shape[:2]
-
-                    line_cfg = exit_cfg.get("line")
-                    hline_out, vline_out = None, None
-                    enter_dir_out = None
-                    if line_cfg:
-                        enter_dir_out = line_cfg.get("enter_direction")
-                        if line_cfg["type"] == "horizontal":
-                            hline_out = line_cfg["coords"][1]
-                        elif line_cfg["type"] == "vertical":
-                            vline_out = line_cfg["coords"][0]
-
-
-                    results_out = model(frame_out, conf=0.4, device=device)
-                    detections_out = [
-                        ([int(r.xyxy[0][0]), int(r.xyxy[0][1]),
-                        int(r.xyxy[0][2] - r.xyxy[0][0]),
-                        int(r.xyxy[0][3] - r.xyxy[0][1])],
-                        float(r.conf[0]), int(r.cls[0]))
-                        for r in results_out[0].boxes if model.names[int(r.cls[0])] == "person"
-                    ]
-
-                    tracks_out = tracker_out.update_tracks(detections_out, frame=frame_out)
-                    for track in tracks_out:
-                        if not track.is_confirmed():
-                            continue
-                        tid = track.track_id
-                        x1, y1, x2, y2 = map(int, track.to_ltrb())
-                        cx, cy = (x1 + x2)//2, (y1 + y2)//2
-
-                        # One direction
-                        # prev = counters["memory_out"].get(tid)
-                        # counted = False
-                        # last_frame = counters["last_count_frame_out"].get(tid, -9999)
-                        # if prev is not None and (frame_id["exit"] - last_frame) > 5:
-                        #     prev_cx, prev_cy = prev["cx"], prev["cy"]
-                        #     # horizontal (downwards)
-                        #     if hline_out is not None and prev_cy < hline_out <= cy:
-                        #         counters["exit_count"] += 1
-                        #         counted = True
-                        #     # vertical (rightwards)
-                        #     if (not counted) and vline_out is not None and prev_cx < vline_out <= cx:
-                        #         counters["exit_count"] += 1
-                        #         counted = True
-                        #     if counted:
-                        #         counters["last_count_frame_out"][tid] = frame_id["exit"]
-
-                        prev = counters["memory_out"].get(tid)
-                        last_frame = counters["last_count_frame_out"].get(tid, -9999)
-                        if prev is not None and (frame_id["exit"] - last_frame) > 5:
-                            prev_cx, prev_cy = prev["cx"], prev["cy"]
-
-                            # Horizontal line logic
-                            if hline_out is not None:
-                                crossed_down = prev_cy < hline_out <= cy
-                                crossed_up   = prev_cy > hline_out >= cy
-                                if crossed_down or crossed_up:
-                                    desired = enter_dir_out or "down"
-                                    if (crossed_down and desired == "down") or (crossed_up and desired == "up"):
-                                        counters["entrance_count"] += 1
-                                    else:
-                                        counters["exit_count"] += 1
-                                    counters["last_count_frame_out"][tid] = frame_id["exit"]
-
-                            # Vertical line logic
-                            if vline_out is not None:
-                                crossed_right = prev_cx < vline_out <= cx
-                                crossed_left  = prev_cx > vline_out >= cx
-                                if crossed_right or crossed_left:
-                                    desired = enter_dir_out or "right"
-                                    if (crossed_right and desired == "right") or (crossed_left and desired == "left"):
-                                        counters["entrance_count"] += 1
-                                    else:
-                                        counters["exit_count"] += 1
-                                    counters["last_count_frame_out"][tid] = frame_id["exit"]
-
-
-                        counters["memory_out"][tid] = {"cx": cx, "cy": cy}
-
-                        cv2.rectangle(frame_out, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                        cv2.putText(frame_out, f"OUT ID {tid}", (x1, y1-5),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
-
-                    if hline_out is not None:
-                        cv2.line(frame_out, (0, hline_out), (w_out, hline_out), (255,0,0), 2)
-                        cv2.putText(frame_out, f"H: {hline_out}", (10, max(20, hline_out-10)),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
-                    if vline_out is not None:
-                        cv2.line(frame_out, (vline_out, 0), (vline_out, h_out), (255,0,0), 2)
-                        cv2.putText(frame_out, f"V: {vline_out}", (min(w_out-80, vline_out+5), 20),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 2)
-
-                    cv2.putText(frame_out, f"Exit: {counters['exit_count']}", (20,40),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-                    cv2.imshow(f"Building {building_id} Exit", frame_out)
-
-        # Update shared counters
-        crowd_inside = max(0, counters["entrance_count"] - counters["exit_count"])
-        # lock ensures that only one thread updates shared_counters at a time
-        with lock:
-            shared_counters[building_id] = crowd_inside
-        #print(f"Building {building_id} Inside: {crowd_inside}")
-
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-
-    # Cleanup        
-    cap_in.release()
-    cap_out.release()
-
-
-# -------------------- START THREADS --------------------
-shared_counters = {} # building_id -> current count inside
-lock = threading.Lock() # to protect shared_counters access
-threads = [] # list of building threads
-
-# Start a Thread for Each Building
-for building_id, feeds in buildings.items():
-    t = threading.Thread(target=process_building, args=(building_id, feeds, shared_counters, lock))
-    t.start()
-    threads.append(t)
+        if not ok:
+            print(f"{state.label} Read failed. Reconnecting...")
+            state.release()
+            return None
+        if frame is None:
+            return None
+        return {"state": state, "frame_id": state.frame_id, "timestamp": time.time(), "frame": frame}
+    finally:
+        if state.closed:
+            state.release()
+        else:
+            pipeline["capture"].put(state)
+        if state.cap is None:
+            time.sleep(0.01)  # avoid spinning when every stream is down
+
+def preprocess(item):
+    item["frame"] = cv2.resize(item["frame"], (640, 480))
+    return item
+
+def detect(item):
+    m = _worker_model()
+    results = m(item["frame"], conf=0.4, verbose=False)
+    # extract person detections
+    item["detections"] = [
+        ([int(r.xyxy[0][0]), int(r.xyxy[0][1]),
+          int(r.xyxy[0][2] - r.xyxy[0][0]),
+          int(r.xyxy[0][3] - r.xyxy[0][1])],
+         float(r.conf[0]), int(r.cls[0]))
+        for r in results[0].boxes if m.names[int(r.cls[0])] == "person"
+    ]
+    return item
+
+def track(item):
+    state = item["state"]
+    # parallel detect workers can reorder frames; the tracker only moves forward
+    if item["frame_id"] <= state.last_tracked:
+        return None
+    state.last_tracked = item["frame_id"]
+    tracks = state.tracker.update_tracks(item["detections"], frame=item["frame"])
+    item["tracks"] = [
+        (track.track_id, *map(int, track.to_ltrb()))
+        for track in tracks if track.is_confirmed()
+    ]
+    return item
+
+def count(item):
+    state = item["state"]
+    lines = state.feed["lines"]
+    for tid, x1, y1, x2, y2 in item["tracks"]:
+        cx, cy = (x1 + x2)//2, (y1 + y2)//2
+        prev = state.memory.get(tid)
+        last_frame = state.last_count_frame.get(tid, -9999)
+        # simple debounce: ignore if we counted this tid in last 5 frames
+        if prev is not None and (item["frame_id"] - last_frame) > 5:
+            for line_cfg in lines:
+                direction = crossing_direction(line_cfg, prev, (cx, cy))
+                if direction is not None:
+                    state.aggregator.record(state.key, direction, state.feed["group"], item["timestamp"])
+                    state.last_count_frame[tid] = item["frame_id"]
+        # update memory
+        state.memory[tid] = (cx, cy)
+    return item
+
+def sink(item):
+    state = item["state"]
+    if state.closed:
+        LIVE.remove(state.key, state)
+        return None
+    frame = item["frame"]
+    inside = state.aggregator.inside
+    if display:
+        draw_overlay(frame, item["tracks"], state.feed["lines"], inside)
+        show_frame(state, frame)
+    # hand the finished frame to the live API; it is not modified after this
+    LIVE.publish(
+        state.key,
+        state,
+        building_id=state.feed["building_id"],
+        feed_id=state.feed["id"],
+        frame_id=item["frame_id"],
+        timestamp=item["timestamp"],
+        frame=frame,
+        detections=item["detections"],
+        tracks=item["tracks"],
+        lines=state.feed["lines"],
+        inside=inside,
+        annotated=display,
+    )
+    return None
+
+def _stage(name, fn, key=None, fixed=None, **defaults):
+    """Build a stage from config: pipeline.stages.<name>.{workers,queue_size,policy}."""
+    cfg = {**defaults, **pipeline_cfg.get("stages", {}).get(name, {}), **(fixed or {})}
+    return Stage(name, fn, key=key, **cfg)
+
+by_feed = lambda item: item["state"].key
+pipeline = Pipeline([
+    # capture's queue holds one ticket per feed, so it must be unbounded
+    _stage("capture", capture, workers=config.get("feed_workers", 2), fixed={"queue_size": 0, "policy": "block"}),
+    _stage("preprocess", preprocess),
+    _stage("detect", detect, queue_size=4),
+    # track/count keep per-feed state: route each feed to a single worker
+    _stage("track", track, key=by_feed),
+    _stage("count", count, key=by_feed),
+    # a single sink worker keeps each feed's frames in order for the display and /live
+    _stage("sink", sink, fixed={"workers": 1}),
+])
+pipeline.start()
+LIVE.stats_provider = pipeline.stats
+
+# -------------------- BUILDINGS --------------------
+aggregators = {} # building_id -> OccupancyAggregator
+building_feeds = {} # building_id -> {feed key: FeedState}
+buildings_lock = threading.Lock() # to protect the registries (main + config watcher)
+
+def add_feed(feed, aggregator):
+    state = FeedState(feed, aggregator)
+    pipeline["capture"].put(state)  # schedule its first read
+    return state
+
+def remove_feed(state):
+    state.closed = True  # capture releases the stream on its next turn
+    LIVE.remove(state.key, state)
+
+def sync_building(building_id, building_cfg):
+    """Start/stop/update only the feeds of this building that changed.
+
+    The aggregator (and therefore the current count) is kept across syncs.
+    """
+    with buildings_lock:
+        aggregator = aggregators.get(building_id)
+        if aggregator is None:
+            aggregator = aggregators[building_id] = OccupancyAggregator(building_id)
+        aggregator.dedup_window = float(building_cfg.get("dedup_window", 1.5))
+        running = building_feeds.setdefault(building_id, {})
+
+        wanted = {f["key"]: f for f in normalize_building_feeds(building_id, building_cfg)}
+        for key in list(running):
+            if key not in wanted or running[key].feed["url"] != wanted[key]["url"]:
+                remove_feed(running.pop(key))
+                print(f"[Building {building_id}] Feed {key} stopped")
+        for key, feed in wanted.items():
+            if key in running:
+                # update lines/group in place, the stages read them per frame
+                running[key].feed["lines"] = feed["lines"]
+                running[key].feed["group"] = feed["group"]
+            else:
+                running[key] = add_feed(feed, aggregator)
+                print(f"[Building {building_id}] Feed {key} started")
+
+def stop_building(building_id):
+    with buildings_lock:
+        for state in building_feeds.pop(building_id, {}).values():
+            remove_feed(state)
+        # drop its aggregator so the DB updater stops writing it
+        aggregators.pop(building_id, None)
+    print(f"[Building {building_id}] Stopped")
+
+def current_counts():
+    with buildings_lock:
+        return {b_id: agg.inside for b_id, agg in aggregators.items()}
+
+for building_id, building_cfg in buildings.items():
+    sync_building(building_id, building_cfg)
+
+# -------------------- CONFIG HOT RELOAD --------------------
+def on_config_change(old_config, new_config):
+    old_buildings = {int(k): v for k, v in old_config.get("buildings", {}).items()}
+    new_buildings = {int(k): v for k, v in new_config.get("buildings", {}).items()}
+    changes = diff_buildings(old_buildings, new_buildings)
+    print(f"Config reloaded: {changes}")
+
+    for b_id in changes["removed"]:
+        stop_building(b_id)
+    for b_id in changes["added"] + changes["restarted"] + changes["updated"]:
+        sync_building(b_id, new_buildings[b_id])
+
+    if changes["added"]:
+        with db_lock:  # db cursor is shared with db_updater
+            db.refresh_building_ids()
+    db.update_interval = new_config.get("update_interval", 10)
+
+    for key in ("yolo", "database", "feed_workers", "pipeline", "live_api"):
+        if old_config.get(key) != new_config.get(key):
+            print(f"Config section '{key}' changed; restart main.py to apply it.")
+
+watcher = ConfigWatcher(
+    config_path,
+    on_config_change,
+    interval=config.get("config_reload_interval", 2),
+    initial=config,
+)
+watcher.start()
 
 # Background thread for DB updates every 1 second
 def db_updater():
     while True:
-        with lock:
-            db.insert_multiple_counts(shared_counters)
+        counts = current_counts()
+        with db_lock:
+            db.insert_multiple_counts(counts)
         time.sleep(1)
 
 db_thread = threading.Thread(target=db_updater, daemon=True) #Daemon thread will exit when main program exits
 db_thread.start()
 
-# Wait for all building threads to finish
-for t in threads:
-    t.join()
+# Optionally serve the API from this process so /live can read the pipeline's
+# in-memory state (a separately started api.py has no live feeds)
+live_api_cfg = config.get("live_api", {})
+if live_api_cfg.get("enabled", False):
+    import uvicorn
+    from .api import app as api_app
+
+    api_server = uvicorn.Server(uvicorn.Config(
+        api_app,
+        host=live_api_cfg.get("host", "0.0.0.0"),
+        port=int(live_api_cfg.get("port", 5000)),
+        log_level="warning",
+    ))
+    threading.Thread(target=api_server.run, daemon=True).start()
+    print(f"Live API on port {live_api_cfg.get('port', 5000)}")
+
+# Run until 'q' is pressed in a window or Ctrl+C, printing the per-stage
+# occupancy/latency view every pipeline.stats_interval seconds (0 = off)
+stats_interval = float(pipeline_cfg.get("stats_interval", 30))
+last_stats = time.time()
+try:
+    while not shutdown.is_set():
+        if display:
+            if update_display() == ord("q"):
+                shutdown.set()
+        else:
+            shutdown.wait(1)
+        if stats_interval > 0 and time.time() - last_stats >= stats_interval:
+            print(pipeline.format_stats())
+            last_stats = time.time()
+except KeyboardInterrupt:
+    shutdown.set()
 
 # Cleanup
+watcher.stop()
+pipeline.stop()
+for states in building_feeds.values():
+    for state in states.values():
+        state.release()
 cv2.destroyAllWindows()
 db.close()
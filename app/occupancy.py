@@ -0,0 +1,59 @@
+# occupancy.py
+import threading
+import time
+from collections import deque
+
+
+class OccupancyAggregator:
+    """Fuses line-crossing events from all feeds of one building.
+
+    Feeds that watch the same doorway share an `overlap_group`. When two
+    feeds of a group report the same direction within `dedup_window`
+    seconds, the later report is treated as the same person and dropped.
+    Each earlier event can absorb at most one report per other feed, so two
+    people passing together still count as two. Feeds without a group are
+    counted independently.
+    """
+
+    def __init__(self, building_id, dedup_window=1.5):
+        self.building_id = building_id
+        self.dedup_window = dedup_window
+        self.entered = 0
+        self.exited = 0
+        self.duplicates = 0
+        # (group, direction) -> deque of [timestamp, feed_key, feeds_matched]
+        self._recent = {}
+        self._newest = float("-inf")  # latest event timestamp seen
+        self._lock = threading.Lock()
+
+    def record(self, feed_key, direction, group=None, timestamp=None):
+        """Record a crossing ("in"/"out"). Returns False if it was a duplicate."""
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if group is not None:
+                recent = self._recent.setdefault((group, direction), deque())
+                # feeds are counted on different workers, so events may arrive
+                # out of timestamp order: match on distance in both directions
+                # and only prune what is too old for any new event to match
+                self._newest = max(self._newest, ts)
+                while recent and recent[0][0] < self._newest - 2 * self.dedup_window:
+                    recent.popleft()
+                for event in recent:
+                    if abs(event[0] - ts) > self.dedup_window:
+                        continue
+                    if event[1] != feed_key and feed_key not in event[2]:
+                        event[2].add(feed_key)
+                        self.duplicates += 1
+                        return False
+                recent.append([ts, feed_key, set()])
+
+            if direction == "in":
+                self.entered += 1
+            else:
+                self.exited += 1
+            return True
+
+    @property
+    def inside(self):
+        with self._lock:
+            return max(0, self.entered - self.exited)
@@ -0,0 +1,190 @@
+# pipeline.py
+"""Stages connected by bounded queues.
+
+Each Stage runs `fn(item)` on its own worker threads and hands the result to
+the next stage. Returning None from `fn` drops the item (e.g. skipped frames).
+When the next stage's queue is full its policy decides what happens:
+
+  - "block":       wait for space, slowing the upstream stage (backpressure)
+  - "drop_oldest": discard the oldest queued item to keep the freshest frames
+  - "drop_newest": discard the incoming item
+
+A stage with a `key` function gets one queue per worker and routes items by
+key, so items with the same key (e.g. the same camera feed) are processed in
+order by the same worker. Trackers rely on that.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class Stage:
+    def __init__(self, name, fn, workers=1, queue_size=8, policy="block", key=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Stage '{name}': unknown policy '{policy}', use one of {POLICIES}")
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.queue_size = int(queue_size)
+        self.policy = policy
+        self.key = key
+        self.next = None
+        n_queues = self.workers if key is not None else 1
+        self.queues = [queue.Queue(maxsize=self.queue_size) for _ in range(n_queues)]
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # stats
+        self._stats_lock = threading.Lock()
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0  # workers currently inside fn
+        self.samples = deque(maxlen=1000)  # (done_at, wait_s, service_s)
+
+    # ---------------- input ----------------
+    def _queue_for(self, item):
+        if self.key is None:
+            return self.queues[0]
+        return self.queues[hash(self.key(item)) % len(self.queues)]
+
+    def put(self, item):
+        """Enqueue an item according to this stage's policy. Returns False if dropped."""
+        q = self._queue_for(item)
+        entry = (time.time(), item)
+        if self.policy == "block":
+            while not self.stop_event.is_set():
+                try:
+                    q.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        while True:
+            try:
+                q.put_nowait(entry)
+                return True
+            except queue.Full:
+                pass
+            if self.policy == "drop_newest":
+                self._count_drop()
+                return False
+            # drop_oldest: make room and retry (another producer may refill it)
+            try:
+                q.get_nowait()
+                self._count_drop()
+            except queue.Empty:
+                pass
+
+    def _count_drop(self):
+        with self._stats_lock:
+            self.dropped += 1
+
+    # ---------------- workers ----------------
+    def _run(self, q):
+        while not self.stop_event.is_set():
+            try:
+                enqueued_at, item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.time()
+            with self._stats_lock:
+                self.busy += 1
+            try:
+                out = self.fn(item)
+            except Exception as e:
+                out = None
+                with self._stats_lock:
+                    self.errors += 1
+                print(f"[Pipeline] Stage '{self.name}' error: {e}")
+            done = time.time()
+            with self._stats_lock:
+                self.busy -= 1
+                self.processed += 1
+                self.samples.append((done, started - enqueued_at, done - started))
+            if out is not None and self.next is not None:
+                self.next.put(out)
+
+    def start(self):
+        for i in range(self.workers):
+            q = self.queues[i % len(self.queues)]
+            t = threading.Thread(target=self._run, args=(q,), name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        for t in self.threads:
+            t.join(timeout=timeout)
+        self.threads = []
+
+    # ---------------- stats ----------------
+    def stats(self, window=10.0):
+        """Snapshot of queue occupancy, throughput and latency over the last `window` seconds."""
+        now = time.time()
+        with self._stats_lock:
+            recent = [s for s in self.samples if s[0] >= now - window]
+            processed, dropped, errors, busy = self.processed, self.dropped, self.errors, self.busy
+        depth = sum(q.qsize() for q in self.queues)
+        capacity = self.queue_size * len(self.queues) if self.queue_size > 0 else None
+        service = sorted(s[2] for s in recent)
+        wait = [s[1] for s in recent]
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "policy": self.policy,
+            "queue_depth": depth,
+            "queue_capacity": capacity,
+            "busy_workers": busy,
+            "utilization": round(sum(service) / (window * self.workers), 3),
+            "processed": processed,
+            "dropped": dropped,
+            "errors": errors,
+            "per_sec": round(len(recent) / window, 2),
+            "wait_ms": round(1000 * sum(wait) / len(wait), 2) if wait else 0.0,
+            "service_ms": round(1000 * sum(service) / len(service), 2) if service else 0.0,
+            "service_p95_ms": round(1000 * service[int(0.95 * (len(service) - 1))], 2) if service else 0.0,
+        }
+
+
+class Pipeline:
+    """Chains stages in order: the output of stage i is put into stage i+1."""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.next = downstream
+        self.by_name = {s.name: s for s in self.stages}
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def start(self):
+        for s in self.stages:
+            s.start()
+
+    def stop(self):
+        for s in self.stages:
+            s.stop_event.set()
+        for s in self.stages:
+            s.stop()
+
+    def stats(self, window=10.0):
+        return [s.stats(window) for s in self.stages]
+
+    def format_stats(self, window=10.0):
+        rows = [
+            f"{'stage':<11}{'wrk':>4}{'queue':>9}{'util':>7}{'/s':>8}{'wait ms':>9}{'svc ms':>9}{'p95 ms':>9}{'drop':>7}"
+        ]
+        for st in self.stats(window):
+            cap = st["queue_capacity"]
+            queue_str = f"{st['queue_depth']}/{cap if cap else '-'}"
+            rows.append(
+                f"{st['stage']:<11}{st['workers']:>4}{queue_str:>9}{st['utilization']:>7.0%}{st['per_sec']:>8}"
+                f"{st['wait_ms']:>9}{st['service_ms']:>9}{st['service_p95_ms']:>9}{st['dropped']:>7}"
+            )
+        return "\n".join(rows)
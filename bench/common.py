@@ -0,0 +1,73 @@
+# common.py
+"""Database settings shared by the benchmark scripts."""
+import json
+import os
+from urllib.parse import urlparse, parse_qs
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SCHEMA_PATH = os.path.join(PROJECT_ROOT, "docs", "sql", "init_schema.sql")
+BENCH_DB = "crowd_monitor_bench"
+
+
+def _config_database():
+    try:
+        with open(os.path.join(PROJECT_ROOT, "config", "config.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("database", {})
+    except Exception:
+        return {}
+
+
+def add_db_arguments(parser):
+    parser.add_argument("--host", help="Postgres host (default: DB_HOST or config.json)")
+    parser.add_argument("--port", type=int, help="Postgres port (default: DB_PORT or config.json)")
+    parser.add_argument("--user", help="Postgres user (default: DB_USER or config.json)")
+    parser.add_argument("--password", help="Postgres password (default: DB_PASS or config.json)")
+    parser.add_argument("--database", default=BENCH_DB,
+                        help=f"Benchmark database, created if missing (default: {BENCH_DB})")
+    parser.add_argument("--embedded", metavar="DATA_DIR",
+                        help="Run a throwaway local Postgres in DATA_DIR instead of connecting to a server "
+                             "(needs `pip install pgserver`, no Docker or system Postgres required)")
+
+
+def db_params(args):
+    """Resolve connection settings: --embedded > CLI flags > DB_* env > config.json."""
+    if args.embedded:
+        return start_embedded(args.embedded, args.database)
+    cfg = _config_database()
+    return {
+        "host": args.host or os.getenv("DB_HOST", cfg.get("host", "localhost")),
+        "port": int(args.port or os.getenv("DB_PORT", str(cfg.get("port", 5432)))),
+        "user": args.user or os.getenv("DB_USER", cfg.get("user", "postgres")),
+        "password": args.password if args.password is not None else os.getenv("DB_PASS", cfg.get("password", "")),
+        "database": args.database,
+    }
+
+
+def start_embedded(data_dir, database):
+    """Start (or reuse) a pgserver instance; it keeps running for later bench runs."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("--embedded needs the optional 'pgserver' package: pip install pgserver")
+    server = pgserver.get_server(os.path.abspath(data_dir), cleanup_mode=None)
+    uri = urlparse(server.get_uri())
+    query = parse_qs(uri.query)
+    return {
+        # unix socket directory; psycopg2 accepts it as host
+        "host": query.get("host", [uri.hostname])[0] or "localhost",
+        "port": uri.port or 5432,
+        "user": uri.username or "postgres",
+        "password": uri.password or "",
+        "database": database,
+    }
+
+
+def api_env(params):
+    """Environment overrides that point app/api.py at the benchmark database."""
+    return {
+        "DB_HOST": str(params["host"]),
+        "DB_PORT": str(params["port"]),
+        "DB_NAME": params["database"],
+        "DB_USER": params["user"],
+        "DB_PASS": params["password"],
+    }
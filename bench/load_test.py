@@ -0,0 +1,196 @@
+# load_test.py
+"""Drive /crowd and /crowd/history with concurrent clients and report latency.
+
+    # against a running API
+    python -m bench.load_test --url http://localhost:5000 --clients 50 --duration 30
+
+    # start app/api.py in a subprocess on the benchmark database (see bench/seed.py)
+    python -m bench.load_test --spawn --clients 50 --duration 30 --json bench_output.json
+
+Reports requests/sec, p50/p95/p99 latency and the DB query time the API
+reports in its Server-Timing header, per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .common import PROJECT_ROOT, add_db_arguments, api_env, db_params
+
+_DB_TIMING = re.compile(r"db;dur=([0-9.]+)")
+_ERROR_BODY_MAX = 512
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def parse_mix(text):
+    """Parse "crowd=1,history=3" into {"crowd": 1.0, "history": 3.0}."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"crowd", "history"}
+    if unknown:
+        raise SystemExit(f"Unknown endpoint(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def make_request(name, buildings, rng):
+    if name == "crowd":
+        return "/crowd", {}
+    minutes = rng.choice([15, 60, 180, 360, 1440, 10080])
+    return "/crowd/history", {"buildingId": rng.randint(1, buildings), "minutes": minutes}
+
+
+async def client(http, deadline, warmup_until, mix, buildings, results, seed):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        path, params = make_request(name, buildings, rng)
+        started = time.perf_counter()
+        try:
+            resp = await http.get(path, params=params)
+        except Exception:
+            resp = None
+        elapsed = (time.perf_counter() - started) * 1000
+        if started < warmup_until:
+            continue
+        ok, db = resp is not None and resp.status_code == 200, None
+        if resp is not None:
+            db = _DB_TIMING.search(resp.headers.get("server-timing", ""))
+            # the API reports errors as small {"error": ...} bodies; skip decoding real payloads
+            if ok and len(resp.content) < _ERROR_BODY_MAX:
+                try:
+                    body = resp.json()
+                    ok = not (isinstance(body, dict) and "error" in body)
+                except ValueError:
+                    ok = False
+        r = results[name]
+        r["latency"].append(elapsed)
+        if db:
+            r["db"].append(float(db.group(1)))
+        if not ok:
+            r["errors"] += 1
+
+
+async def run(url, clients, duration, warmup, mix, buildings):
+    results = {name: {"latency": [], "db": [], "errors": 0} for name in mix}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as http:
+        start = time.perf_counter()
+        warmup_until = start + warmup
+        deadline = warmup_until + duration
+        await asyncio.gather(*(
+            client(http, deadline, warmup_until, mix, buildings, results, seed=i)
+            for i in range(clients)
+        ))
+    return summarize(results, duration)
+
+
+def summarize(results, duration):
+    summary = {}
+    for name, r in results.items():
+        lat, db = r["latency"], r["db"]
+        summary[name] = {
+            "requests": len(lat),
+            "errors": r["errors"],
+            "req_per_sec": round(len(lat) / duration, 1),
+            "p50_ms": round(percentile(lat, 50), 2),
+            "p95_ms": round(percentile(lat, 95), 2),
+            "p99_ms": round(percentile(lat, 99), 2),
+            "db_p50_ms": round(percentile(db, 50), 2),
+            "db_p95_ms": round(percentile(db, 95), 2),
+            "db_p99_ms": round(percentile(db, 99), 2),
+        }
+    return summary
+
+
+def format_summary(summary):
+    rows = [f"{'endpoint':<10}{'reqs':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'db p50':>9}{'db p95':>9}{'db p99':>9}{'errors':>8}"]
+    for name, s in summary.items():
+        rows.append(f"{name:<10}{s['requests']:>8}{s['req_per_sec']:>9}{s['p50_ms']:>9}{s['p95_ms']:>9}"
+                    f"{s['p99_ms']:>9}{s['db_p50_ms']:>9}{s['db_p95_ms']:>9}{s['db_p99_ms']:>9}{s['errors']:>8}")
+    return "\n".join(rows)
+
+
+def spawn_api(params, timeout=60):
+    """Start app/api.py with uvicorn in a subprocess on a free local port.
+
+    A separate process keeps the API and this load generator from competing
+    for the same GIL. Returns (process, base_url).
+    """
+    env = {**os.environ, **api_env(params), "DISABLE_STATIC": "1", "DISABLE_CONFIG_WATCH": "1"}
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"API process exited during startup (code {proc.returncode})")
+        try:
+            # lifespan (DB connect) has finished once requests are answered
+            if httpx.get(f"{url}/", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    proc.wait(timeout=10)
+    raise SystemExit(f"API did not start within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the crowd API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:5000", help="Base URL of a running API")
+    target.add_argument("--spawn", action="store_true", help="Start app/api.py in a subprocess on the benchmark database")
+    add_db_arguments(parser)
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients (default: 20)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds (default: 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured warm-up seconds (default: 3)")
+    parser.add_argument("--buildings", type=int, default=200, help="Building ids to query, 1..N (default: 200)")
+    parser.add_argument("--mix", default="crowd=1,history=3", help="Endpoint weights (default: crowd=1,history=3)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    proc, url = spawn_api(db_params(args)) if args.spawn else (None, args.url)
+    try:
+        print(f"Load-testing {url}: {args.clients} clients, {args.duration:g}s (+{args.warmup:g}s warm-up)")
+        summary = asyncio.run(run(url, args.clients, args.duration, args.warmup, mix, args.buildings))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"clients": args.clients, "duration": args.duration, "endpoints": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
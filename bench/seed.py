@@ -0,0 +1,128 @@
+# seed.py
+"""Seed a benchmark database with synthetic crowd_counts.
+
+    python -m bench.seed --buildings 300 --days 90 --interval 60 --reset
+    python -m bench.seed --embedded .bench-pg          # no Postgres server needed
+
+The schema comes from docs/sql/init_schema.sql, or --schema to benchmark a
+changed schema. Rows are streamed with COPY and end at "now", so the API's
+lookback windows always hit data. Rows are appended unless --reset is given.
+"""
+import argparse
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2 import sql
+
+from .common import BENCH_DB, SCHEMA_PATH, add_db_arguments, db_params
+
+
+def ensure_database(params):
+    conn = psycopg2.connect(**{**params, "database": "postgres"})
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (params["database"],))
+            if cur.fetchone() is None:
+                cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(params["database"])))
+                print(f"Created database {params['database']}")
+    finally:
+        conn.close()
+
+
+def synthetic_rows(building_ids, days, interval, seed):
+    """Yield CSV lines "building_id,count,timestamp" with a daily crowd curve plus noise."""
+    rng = random.Random(seed)
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=days)
+    steps = int(days * 86400 // interval)
+    for b_id in building_ids:
+        peak = rng.randint(20, 400)
+        phase = rng.uniform(-2, 2)  # hours the building's peak is shifted from 13:00
+        for i in range(steps + 1):
+            ts = start + timedelta(seconds=i * interval)
+            hour = ts.hour + ts.minute / 60
+            day_curve = max(0.0, math.cos((hour - 13 - phase) / 24 * 2 * math.pi))
+            weekday = 0.35 if ts.weekday() >= 5 else 1.0
+            count = max(0, int(peak * weekday * day_curve ** 2 + rng.gauss(0, peak * 0.05)))
+            yield f"{b_id},{count},{ts.isoformat(sep=' ')}\n"
+
+
+class _LineStream(io.RawIOBase):
+    """File-like wrapper so COPY can stream rows without building them in memory."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buf = bytearray()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buf) < len(b):
+            try:
+                self._buf.extend(next(self._lines).encode())
+            except StopIteration:
+                break
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        del self._buf[:n]
+        return n
+
+
+def seed(params, buildings, days, interval, schema, reset, seed_value):
+    ensure_database(params)
+    conn = psycopg2.connect(**params)
+    try:
+        with conn.cursor() as cur:
+            with open(schema, "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+            building_ids = list(range(1, buildings + 1))
+            cur.executemany(
+                "INSERT INTO buildings (building_id, building_name) VALUES (%s, %s) "
+                "ON CONFLICT (building_id) DO NOTHING",
+                [(b_id, f"B{b_id}") for b_id in building_ids],
+            )
+            if reset:
+                cur.execute("TRUNCATE crowd_counts")
+            conn.commit()
+
+            total = buildings * (int(days * 86400 // interval) + 1)
+            print(f"Seeding {total:,} rows ({buildings} buildings x {days} days @ {interval}s)...")
+            started = time.perf_counter()
+            stream = io.BufferedReader(_LineStream(synthetic_rows(building_ids, days, interval, seed_value)), 1 << 20)
+            cur.copy_expert(
+                "COPY crowd_counts (building_id, current_count, timestamp) FROM STDIN WITH (FORMAT csv)",
+                stream,
+            )
+            conn.commit()
+            cur.execute("ANALYZE crowd_counts")
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            print(f"Done in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database with synthetic crowd_counts")
+    add_db_arguments(parser)
+    parser.add_argument("--buildings", type=int, default=200, help="Number of buildings (default: 200)")
+    parser.add_argument("--days", type=float, default=60, help="Days of history per building (default: 60)")
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between rows (default: 300)")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help="Schema SQL to apply before seeding")
+    parser.add_argument("--reset", action="store_true",
+                        help=f"Truncate crowd_counts first (only allowed on the {BENCH_DB} database)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    args = parser.parse_args()
+    if args.reset and args.database != BENCH_DB:
+        parser.error(f"--reset truncates crowd_counts and is only allowed on the {BENCH_DB} database")
+    seed(db_params(args), args.buildings, args.days, args.interval, args.schema, args.reset, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ import {
   Legend,
   TimeScale,
 } from 'chart.js'
+import { fetchBuildingHistory } from '../historyClient'
 
 ChartJS.register(LineElement, CategoryScale, LinearScale, PointElement, Tooltip, Legend)
 
@@ -25,10 +26,7 @@ export default function HistoryModal({ open, building, onClose }) {
       setLoading(true)
       setError(null)
       try {
-        const res = await fetch(`/crowd/history?buildingId=${encodeURIComponent(building.id)}&minutes=${range}`)
-        if (!res.ok) throw new Error(`HTTP ${res.status}`)
-        const json = await res.json()
-        setData(Array.isArray(json) ? json : [])
+        setData(await fetchBuildingHistory(building.id, range))
       } catch (e) {
         setError(e)
       } finally {
@@ -39,7 +37,7 @@ export default function HistoryModal({ open, building, onClose }) {
   }, [open, building?.id, range])
 
   const chartData = useMemo(() => {
-    const labels = data?.map(d => new Date(d.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })) ?? []
+    const labels = data?.map(d => d.time.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })) ?? []
     const series = data?.map(d => d.count ?? 0) ?? []
     return {
       labels,
@@ -0,0 +1,31 @@
+// Fetches every building's history in one compact (columnar) request and
+// shares it between HistoryModal opens. Entries expire after CACHE_MS.
+const CACHE_MS = 30000
+const cache = new Map() // minutes -> { at, promise }
+
+function fetchAllHistory(minutes) {
+  const hit = cache.get(minutes)
+  if (hit && Date.now() - hit.at < CACHE_MS) return hit.promise
+
+  const promise = fetch(`/crowd/history/batch?minutes=${minutes}&format=columnar`, { cache: 'no-store' })
+    .then(async (res) => {
+      if (!res.ok) throw new Error(`HTTP ${res.status}`)
+      const json = await res.json()
+      if (json?.error) throw new Error(json.error)
+      return json
+    })
+  promise.catch(() => cache.delete(minutes))
+  cache.set(minutes, { at: Date.now(), promise })
+  return promise
+}
+
+// Returns [{ time: Date, count }] for one building.
+export async function fetchBuildingHistory(buildingId, minutes) {
+  const json = await fetchAllHistory(minutes)
+  const series = json.buildings?.[String(buildingId)]
+  if (!series) return []
+  return series.offsets.map((offset, i) => ({
+    time: new Date((json.start + offset) * 1000),
+    count: series.counts[i],
+  }))
+}
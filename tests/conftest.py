@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Make `app` / `bench` importable and keep app.api from mounting static files
+# or watching config.json when tests import it.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+os.environ.setdefault("DISABLE_STATIC", "1")
+os.environ.setdefault("DISABLE_CONFIG_WATCH", "1")
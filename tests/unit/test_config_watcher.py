@@ -0,0 +1,76 @@
+import json
+
+from app.config_watcher import ConfigWatcher, diff_buildings
+
+LINE = {"type": "horizontal", "coords": [0, 240, 640, 240]}
+
+
+def test_diff_buildings_categories():
+    old = {
+        1: {"entrance": {"url": "a", "line": LINE}},
+        2: {"entrance": "b"},
+        3: {"entrance": "c"},
+        5: {"entrance": "e", "threshold": 10},
+    }
+    new = {
+        1: {"entrance": {"url": "a", "line": {**LINE, "coords": [0, 300, 640, 300]}}},  # line moved
+        2: {"entrance": "b2"},  # url changed
+        4: {"entrance": "d"},
+        5: {"entrance": "e", "threshold": 10},  # unchanged
+    }
+    assert diff_buildings(old, new) == {"added": [4], "removed": [3], "restarted": [2], "updated": [1]}
+
+
+def test_diff_buildings_feed_added_restarts():
+    old = {1: {"feeds": [{"id": "a", "url": "a"}]}}
+    new = {1: {"feeds": [{"id": "a", "url": "a"}, {"id": "b", "url": "b"}]}}
+    assert diff_buildings(old, new)["restarted"] == [1]
+
+
+def test_diff_buildings_group_change_is_in_place():
+    old = {1: {"feeds": [{"id": "a", "url": "a"}]}}
+    new = {1: {"feeds": [{"id": "a", "url": "a", "overlap_group": "g"}], "dedup_window": 2}}
+    assert diff_buildings(old, new)["updated"] == [1]
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_watcher_applies_change(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"a": 1})
+    seen = []
+    watcher = ConfigWatcher(str(path), lambda old, new: seen.append((old, new)))
+    _write(path, {"a": 2, "pad": "x"})
+    assert watcher.poll()
+    assert seen == [({"a": 1}, {"a": 2, "pad": "x"})]
+    assert watcher.config == {"a": 2, "pad": "x"}
+
+
+def test_watcher_keeps_config_on_parse_error(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"a": 1})
+    watcher = ConfigWatcher(str(path), lambda old, new: None)
+    path.write_text("{broken", encoding="utf-8")
+    assert not watcher.poll()
+    assert watcher.config == {"a": 1}
+
+
+def test_watcher_retries_failed_apply(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"a": 1})
+    calls = []
+
+    def on_change(old, new):
+        calls.append(old)
+        if len(calls) == 1:
+            raise ValueError("boom")
+
+    watcher = ConfigWatcher(str(path), on_change)
+    _write(path, {"a": 2, "pad": "x"})
+    assert not watcher.poll()
+    assert watcher.config == {"a": 1}
+    assert watcher.poll()  # retried although the file did not change again
+    assert calls == [{"a": 1}, {"a": 1}]
+    assert watcher.config == {"a": 2, "pad": "x"}
@@ -0,0 +1,54 @@
+from app.feeds import crossing_direction, normalize_building_feeds
+
+HLINE = {"type": "horizontal", "coords": [0, 240, 640, 240], "enter_direction": "up"}
+VLINE = {"type": "vertical", "coords": [320, 0, 320, 480]}
+
+
+def keys(building_cfg):
+    return [f["key"] for f in normalize_building_feeds(1, building_cfg)]
+
+
+def test_legacy_entrance_exit():
+    feeds = normalize_building_feeds(1, {"entrance": {"url": "a.mp4", "line": HLINE}, "exit": "b.mp4"})
+    assert [(f["key"], f["url"], f["lines"]) for f in feeds] == [
+        ("1:entrance", "a.mp4", [HLINE]),
+        ("1:exit", "b.mp4", []),
+    ]
+
+
+def test_feeds_list_with_lines_and_group():
+    feeds = normalize_building_feeds(1, {"feeds": [
+        {"id": "north", "url": "n", "lines": [HLINE, VLINE], "overlap_group": "lobby"},
+    ]})
+    assert feeds[0]["key"] == "1:north"
+    assert feeds[0]["lines"] == [HLINE, VLINE]
+    assert feeds[0]["group"] == "lobby"
+
+
+def test_unnamed_feeds_use_index():
+    assert keys({"feeds": [{"url": "a"}, {"url": "b"}]}) == ["1:0", "1:1"]
+
+
+def test_auto_ids_skip_explicit_ids():
+    assert keys({"feeds": [{"id": "1", "url": "a"}, {"url": "b"}]}) == ["1:1", "1:1_"]
+
+
+def test_duplicate_ids_keep_first():
+    cfg = {"feeds": [{"id": "entrance", "url": "a"}], "entrance": "b"}
+    feeds = normalize_building_feeds(1, cfg)
+    assert [(f["key"], f["url"]) for f in feeds] == [("1:entrance", "a")]
+
+
+def test_feeds_without_url_are_skipped():
+    assert keys({"feeds": [{"id": "x"}], "entrance": {"line": HLINE}}) == []
+
+
+def test_crossing_direction_horizontal():
+    assert crossing_direction(HLINE, (0, 250), (0, 230)) == "in"   # up = enter
+    assert crossing_direction(HLINE, (0, 230), (0, 250)) == "out"
+    assert crossing_direction(HLINE, (0, 200), (0, 230)) is None
+
+
+def test_crossing_direction_vertical_default_right():
+    assert crossing_direction(VLINE, (300, 0), (330, 0)) == "in"
+    assert crossing_direction(VLINE, (330, 0), (300, 0)) == "out"
@@ -0,0 +1,124 @@
+import gzip
+import json
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg2")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.api as api  # noqa: E402
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+class FakeCursor:
+    """Answers the history queries with rows 10, 20 and 30 minutes old."""
+
+    def execute(self, query, params=None):
+        self.query, self.params = query, params
+
+    def fetchall(self):
+        stamps = [NOW - timedelta(minutes=m) for m in (30, 20, 10)]
+        if "building_id, timestamp" in self.query:
+            return [
+                {"building_id": b_id, "timestamp": ts, "current_count": b_id * 10 + i}
+                for b_id in (1, 3)
+                for i, ts in enumerate(stamps)
+            ]
+        return [{"timestamp": ts, "current_count": i} for i, ts in enumerate(stamps)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "cur", FakeCursor())
+    return TestClient(api.app)
+
+
+def test_json_format_unchanged(client):
+    resp = client.get("/crowd/history", params={"buildingId": 1})
+    body = resp.json()
+    assert [row["count"] for row in body] == [0, 1, 2]
+    assert body[0]["timestamp"] == (NOW - timedelta(minutes=30)).isoformat()
+    assert resp.headers["server-timing"].startswith("db;dur=")
+
+
+def test_columnar_offsets_are_relative_to_range_start(client):
+    resp = client.get("/crowd/history", params={"buildingId": 1, "minutes": 60, "format": "columnar"})
+    assert resp.headers["content-type"] == api.COLUMNAR_MEDIA_TYPE
+    body = resp.json()
+    assert body["buildingId"] == 1
+    assert body["counts"] == [0, 1, 2]
+    assert body["end"] - body["start"] == 3600
+    for offset, minutes in zip(body["offsets"], (30, 20, 10)):
+        assert abs(body["start"] + offset - (NOW - timedelta(minutes=minutes)).timestamp()) <= 1
+
+
+def test_accept_header_selects_format(client):
+    resp = client.get("/crowd/history", params={"buildingId": 1}, headers={"Accept": api.COLUMNAR_MEDIA_TYPE})
+    assert "offsets" in resp.json()
+
+
+def test_binary_layout(client):
+    resp = client.get(
+        "/crowd/history/batch",
+        params={"buildingIds": "1,3,7"},
+        headers={"Accept": api.BINARY_MEDIA_TYPE, "Accept-Encoding": "identity"},
+    )
+    assert resp.headers["content-type"] == api.BINARY_MEDIA_TYPE
+    data = resp.content
+    assert data[:4] == b"CRH1"
+    n_buildings, start = struct.unpack_from("<Id", data, 4)
+    assert n_buildings == 3
+    pos, series = 16, {}
+    for _ in range(n_buildings):
+        b_id, n = struct.unpack_from("<iI", data, pos)
+        pos += 8
+        offsets = struct.unpack_from(f"<{n}I", data, pos)
+        pos += 4 * n
+        counts = struct.unpack_from(f"<{n}i", data, pos)
+        pos += 4 * n
+        series[b_id] = (offsets, counts)
+    assert pos == len(data)
+    assert series[1][1] == (10, 11, 12)
+    assert series[3][1] == (30, 31, 32)
+    assert series[7] == ((), ())  # requested but without rows
+    assert series[1][0] == series[3][0]
+
+
+def test_batch_columnar_and_json(client):
+    columnar = client.get("/crowd/history/batch", params={"format": "columnar"}).json()
+    assert set(columnar["buildings"]) == {"1", "3"}
+    assert columnar["buildings"]["3"]["counts"] == [30, 31, 32]
+    plain = client.get("/crowd/history/batch").json()
+    assert [row["count"] for row in plain["1"]] == [10, 11, 12]
+
+
+def test_batch_filters_by_ids(client):
+    client.get("/crowd/history/batch", params={"buildingIds": "1,3"})
+    assert "ANY(%s)" in api.cur.query
+    assert api.cur.params[-1] == [1, 3]
+
+
+def test_batch_rejects_bad_ids(client):
+    assert "error" in client.get("/crowd/history/batch", params={"buildingIds": "1,x"}).json()
+
+
+class FakeRequest:
+    def __init__(self, accept_encoding):
+        self.headers = {"accept-encoding": accept_encoding}
+
+
+def test_large_bodies_are_gzipped():
+    payload = json.dumps([0] * 1000).encode()
+    resp = api._history_response(FakeRequest("gzip"), payload, "application/json", 0.0)
+    assert resp.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(resp.body) == payload
+
+
+def test_small_bodies_are_not_compressed():
+    resp = api._history_response(FakeRequest("gzip"), b"[]", "application/json", 0.0)
+    assert "content-encoding" not in resp.headers
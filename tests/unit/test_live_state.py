@@ -0,0 +1,150 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from app import live_state  # noqa: E402
+from app.live_state import LiveState  # noqa: E402
+
+LINE = {"type": "horizontal", "coords": [0, 20, 64, 20]}
+
+
+class Owner:
+    """Stands in for the pipeline's FeedState."""
+
+
+def publish(live, owner, frame_id=1, annotated=True, frame=None):
+    live.publish(
+        "1:a",
+        owner,
+        building_id=1,
+        feed_id="a",
+        frame_id=frame_id,
+        timestamp=100.0,
+        frame=np.zeros((48, 64, 3), np.uint8) if frame is None else frame,
+        detections=[([1, 2, 10, 20], 0.91234, 0)],
+        tracks=[(7, 1, 2, 11, 22)],
+        lines=[LINE],
+        inside=3,
+        annotated=annotated,
+    )
+
+
+@pytest.fixture
+def encodes(monkeypatch):
+    calls = []
+    real = cv2.imencode
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "imencode", counting)
+    return calls
+
+
+def test_remove_only_by_owner():
+    live, old, new = LiveState(), Owner(), Owner()
+    publish(live, old)
+    publish(live, new, frame_id=2)  # feed restarted under the same key
+    live.remove("1:a", old)
+    assert live.frame_id(1, "a") == 2
+    live.remove("1:a", new)
+    assert live.frame_id(1, "a") is None
+    assert live.feeds() == []
+
+
+def test_feeds_and_detections():
+    live = LiveState()
+    publish(live, Owner())
+    [feed] = live.feeds()
+    assert (feed["key"], feed["frameId"], feed["tracks"], feed["inside"]) == ("1:a", 1, 1, 3)
+    data = live.detections(1, "a")
+    assert data["detections"] == [{"bbox": [1, 2, 10, 20], "confidence": 0.912, "classId": 0}]
+    assert data["tracks"] == [{"id": 7, "bbox": [1, 2, 11, 22]}]
+    assert live.detections(1, "b") is None
+
+
+def test_jpeg_is_encoded_once_per_frame_and_quality(encodes):
+    live = LiveState()
+    publish(live, Owner())
+    first, frame_id = live.jpeg(1, "a")
+    assert first[:2] == b"\xff\xd8" and frame_id == 1
+    assert live.jpeg(1, "a") == (first, 1)
+    assert len(encodes) == 1
+    live.jpeg(1, "a", quality=50)
+    assert len(encodes) == 2
+    publish(live, Owner(), frame_id=2)
+    assert live.jpeg(1, "a")[1] == 2
+    assert len(encodes) == 3
+
+
+def test_unannotated_frame_is_drawn_on_a_copy():
+    live = LiveState()
+    frame = np.zeros((48, 64, 3), np.uint8)
+    publish(live, Owner(), annotated=False, frame=frame)
+    live.jpeg(1, "a")
+    assert not frame.any()  # the published frame stays untouched
+
+
+def test_annotated_frame_is_not_drawn_again(monkeypatch):
+    drawn = []
+    monkeypatch.setattr(live_state, "draw_overlay", lambda *args: drawn.append(args))
+    live = LiveState()
+    publish(live, Owner(), annotated=True)
+    live.jpeg(1, "a")
+    assert drawn == []
+    publish(live, Owner(), frame_id=2, annotated=False)
+    live.jpeg(1, "a")
+    assert len(drawn) == 1
+
+
+def test_missing_feed_has_no_jpeg():
+    assert LiveState().jpeg(1, "a") == (None, None)
+
+
+# -------------------- /live endpoints --------------------
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("psycopg2")
+    from fastapi.testclient import TestClient
+    import app.api as api
+
+    live = LiveState()
+    monkeypatch.setattr(api, "LIVE", live)
+    return TestClient(api.app), live
+
+
+def test_live_endpoints(client):
+    http, live = client
+    assert http.get("/live").json() == []
+    assert "error" in http.get("/live/pipeline").json()
+    assert "error" in http.get("/live/1/a").json()
+    assert http.get("/live/1/a/snapshot.jpg").status_code == 404
+
+    publish(live, Owner())
+    live.stats_provider = lambda: [{"stage": "sink"}]
+    assert [f["key"] for f in http.get("/live").json()] == ["1:a"]
+    assert http.get("/live/pipeline").json() == [{"stage": "sink"}]
+    assert http.get("/live/1/a").json()["frameId"] == 1
+
+
+def test_snapshot_etag_skips_encoding(client, encodes):
+    http, live = client
+    publish(live, Owner(), frame_id=5)
+    etag = '"1:a:5:80"'
+    resp = http.get("/live/1/a/snapshot.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert encodes == []  # cold cache, but the client already has this frame
+
+    resp = http.get("/live/1/a/snapshot.jpg")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/jpeg"
+    assert resp.headers["etag"] == etag
+    assert len(encodes) == 1
+
+    publish(live, Owner(), frame_id=6)
+    resp = http.get("/live/1/a/snapshot.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["etag"] == '"1:a:6:80"'
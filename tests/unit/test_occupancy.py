@@ -0,0 +1,70 @@
+from app.occupancy import OccupancyAggregator
+
+
+def test_ungrouped_feeds_are_counted_independently():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", None, 10.0)
+    assert agg.record("1:b", "in", None, 10.0)
+    assert agg.record("1:a", "out", None, 10.5)
+    assert (agg.entered, agg.exited, agg.inside) == (2, 1, 1)
+
+
+def test_overlapping_feed_within_window_is_a_duplicate():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert not agg.record("1:b", "in", "lobby", 11.0)
+    assert agg.inside == 1
+    assert agg.duplicates == 1
+
+
+def test_same_feed_is_never_deduplicated():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert agg.record("1:a", "in", "lobby", 10.1)
+    assert agg.inside == 2
+
+
+def test_each_event_absorbs_one_report_per_other_feed():
+    # two people pass together: both cameras see both of them
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert agg.record("1:a", "in", "lobby", 10.1)
+    assert not agg.record("1:b", "in", "lobby", 10.2)
+    assert not agg.record("1:b", "in", "lobby", 10.3)
+    assert agg.record("1:b", "in", "lobby", 10.4)  # a third person only b saw
+    assert agg.inside == 3
+
+
+def test_directions_and_groups_do_not_match_each_other():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert agg.record("1:b", "out", "lobby", 10.2)
+    assert agg.record("1:c", "in", "dock", 10.2)
+    assert (agg.entered, agg.exited) == (2, 1)
+
+
+def test_events_outside_window_are_distinct():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert agg.record("1:b", "in", "lobby", 12.0)
+    assert agg.inside == 2
+
+
+def test_out_of_order_events_outside_window_are_distinct():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert agg.record("1:b", "in", "lobby", 5.0)
+    assert agg.inside == 2
+
+
+def test_out_of_order_events_within_window_are_duplicates():
+    agg = OccupancyAggregator(1, dedup_window=1.5)
+    assert agg.record("1:a", "in", "lobby", 10.0)
+    assert not agg.record("1:b", "in", "lobby", 9.0)
+    assert agg.inside == 1
+
+
+def test_inside_never_negative():
+    agg = OccupancyAggregator(1)
+    agg.record("1:a", "out", None, 1.0)
+    assert agg.inside == 0
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from app.pipeline import Pipeline, Stage
+
+
+def _entries(stage):
+    return [item for _, item in list(stage.queues[0].queue)]
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        Stage("s", lambda x: x, policy="nope")
+
+
+def test_drop_newest_discards_incoming():
+    stage = Stage("s", lambda x: x, queue_size=2, policy="drop_newest")
+    assert stage.put(1) and stage.put(2)
+    assert not stage.put(3)
+    assert _entries(stage) == [1, 2]
+    assert stage.dropped == 1
+
+
+def test_drop_oldest_keeps_freshest():
+    stage = Stage("s", lambda x: x, queue_size=2, policy="drop_oldest")
+    for i in range(5):
+        assert stage.put(i)
+    assert _entries(stage) == [3, 4]
+    assert stage.dropped == 3
+
+
+def test_block_waits_for_space():
+    stage = Stage("s", lambda x: x, queue_size=1, policy="block")
+    assert stage.put(1)
+    done = threading.Event()
+    threading.Thread(target=lambda: (stage.put(2), done.set()), daemon=True).start()
+    assert not done.wait(0.2)  # blocked: backpressure
+    stage.queues[0].get()
+    assert done.wait(1)
+    assert _entries(stage) == [2]
+    assert stage.dropped == 0
+
+
+def test_block_gives_up_when_stopped():
+    stage = Stage("s", lambda x: x, queue_size=1, policy="block")
+    stage.put(1)
+    stage.stop_event.set()
+    assert not stage.put(2)
+
+
+def test_key_routes_same_key_to_same_queue():
+    stage = Stage("s", lambda x: x, workers=4, queue_size=0, key=lambda item: item[0])
+    for i in range(20):
+        stage.put(("a", i))
+    queues = [q for q in stage.queues if q.qsize()]
+    assert len(queues) == 1 and queues[0].qsize() == 20
+
+
+def test_pipeline_preserves_per_key_order_and_drops_none():
+    seen = {}
+    lock = threading.Lock()
+
+    def collect(item):
+        with lock:
+            seen.setdefault(item[0], []).append(item[1])
+
+    pipeline = Pipeline([
+        Stage("src", lambda item: None if item[1] % 5 == 0 else item, workers=1, queue_size=0),
+        Stage("keyed", lambda item: (time.sleep(0.001), item)[1], workers=3, key=lambda item: item[0]),
+        Stage("sink", collect, workers=1),
+    ])
+    pipeline.start()
+    try:
+        for i in range(60):
+            pipeline["src"].put((i % 3, i))
+        deadline = time.time() + 5
+        while sum(len(v) for v in seen.values()) < 48 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        pipeline.stop()
+
+    assert sum(len(v) for v in seen.values()) == 48  # multiples of 5 dropped by src
+    for values in seen.values():
+        assert values == sorted(values)
+    stats = {s["stage"]: s for s in pipeline.stats()}
+    assert stats["src"]["processed"] == 60
+    assert stats["keyed"]["processed"] == 48
+
+
+def test_stage_errors_are_counted():
+    def boom(item):
+        raise RuntimeError("x")
+
+    pipeline = Pipeline([Stage("s", boom)])
+    pipeline.start()
+    try:
+        pipeline["s"].put(1)
+        deadline = time.time() + 2
+        while pipeline["s"].errors == 0 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        pipeline.stop()
+    assert pipeline["s"].errors == 1